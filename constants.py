@@ -1,16 +1,19 @@
 # constants.py
 
+from types import MappingProxyType
+
 # ======================
 # Color Definitions (Centralize all chart colors here)
+# Wrapped in MappingProxyType so no chart builder can mutate them at runtime.
 # ======================
-COLORS = {
+COLORS = MappingProxyType({
     "revenue": "#FFA500",              # orange
     "gross_profit": "#1f77b4",         # blue
     "gross_profit_percent": "#800080" , # purple
     "customer_count": "#27ae60"  # ✅ Add this line (green)
-}
+})
 # 🎨 Fixed color mapping for KPI Centers (TERRITORY + VERTICAL)
-COLOR_CENTER_MAP = {
+COLOR_CENTER_MAP = MappingProxyType({
     # VERTICAL
     "VAM": "#ff6f61",      # Coral
     "COEM": "#6b5b95",     # Indigo
@@ -29,26 +32,27 @@ COLOR_CENTER_MAP = {
 
     # Fallback
     "Unmapped": "#aec7e8"  # Light Blue
-}
+})
 
 
 # ======================
 # Month Order (for sorting consistently across all charts)
+# Tuple: immutable + hashable, safe to use as a default argument.
 # ======================
-MONTH_ORDER = [
+MONTH_ORDER = (
     "Jan", "Feb", "Mar", "Apr", "May", "Jun",
     "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"
-]
+)
 
 # ======================
 # Metric Display Names (for unified naming across charts)
 # ======================
-METRIC_LABELS = {
+METRIC_LABELS = MappingProxyType({
     "adjusted_revenue_usd": "Revenue (USD)",
     "invoiced_gross_profit_usd": "Gross Profit (USD)"
-}
+})
 
-METRIC_ORDER = ["Revenue (USD)", "Gross Profit (USD)"]
+METRIC_ORDER = ("Revenue (USD)", "Gross Profit (USD)")
 
 # ======================
 # Chart Size Settings (centralize all size configs)
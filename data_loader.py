@@ -1,52 +1,150 @@
 #data_loader.py
 
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 from sqlalchemy import text
 from db import get_db_engine
 import streamlit as st
 
+# Local Parquet cache: survives Streamlit process restarts (st.cache_data does
+# not), so a fresh worker within the TTL reads mmap'd Arrow buffers instead of
+# re-issuing the full SELECT against MySQL.
+_PARQUET_CACHE_DIR = "/tmp/sales_report_cache"
+
+
+def _read_view_cached(name, query, engine, ttl=1800, **read_kwargs):
+    """
+    Read a view through a Parquet disk cache keyed by name.
+
+    Falls back to a plain read_sql whenever the cache cannot be read or
+    written (e.g. pyarrow missing, read-only filesystem).
+    """
+    path = os.path.join(_PARQUET_CACHE_DIR, f"{name}.parquet")
+    try:
+        if os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl:
+            return pd.read_parquet(path)
+    except Exception:
+        pass  # stale/corrupt cache → fall through to the database
+
+    df = pd.read_sql(text(query), engine, **read_kwargs)
+
+    try:
+        os.makedirs(_PARQUET_CACHE_DIR, exist_ok=True)
+        df.to_parquet(path)
+    except Exception:
+        pass  # caching is best-effort only
+
+    return df
+
 @st.cache_data(ttl=1800)
 def load_data():
     """
     Load all required datasets from the database.
 
+    The INTERNAL slices of the two KPI-center frames are split off once here,
+    so the processing functions never re-scan for kpi_type == 'INTERNAL'.
+
     Returns:
-        tuple: (inv_df, inv_by_kpi_center_df, backlog_df, backlog_by_kpi_center_df)
+        tuple: (inv_df, inv_by_kpi_center_df, internal_kpi_df,
+                backlog_df, backlog_by_kpi_center_df, internal_backlog_kpi_df)
     """
     engine = get_db_engine()
 
+    # Select only the columns the dashboard consumes — the flat views are wide,
+    # and every extra column is wasted wire transfer and RAM.
     inv_query = """
-        SELECT *
+        SELECT inv_date, customer, customer_id, si_id, oc_number, brand,
+               calculated_invoiced_amount_usd, invoiced_gross_profit_usd
         FROM prostechvn.sales_invoice_full_looker_view
         WHERE DATE(inv_date) >= DATE_FORMAT(CURDATE(), '%Y-01-01')
           AND inv_date < DATE_ADD(DATE_FORMAT(CURDATE(), '%Y-%m-%d'), INTERVAL 1 DAY);
     """
 
     inv_by_kpi_center_query = """
-        SELECT *
+        SELECT invoice_month, kpi_type, kpi_center,
+               sales_by_kpi_center_usd, gross_profit_by_kpi_center_usd
         FROM prostechvn.sales_report_by_kpi_center_flat_looker_view
         WHERE DATE(inv_date) >= DATE_FORMAT(CURDATE(), '%Y-01-01')
           AND inv_date < DATE_ADD(DATE_FORMAT(CURDATE(), '%Y-%m-%d'), INTERVAL 1 DAY);
     """
 
     backlog_query = """
-        SELECT *
+        SELECT outstanding_amount_usd, outstanding_gross_profit_usd
         FROM prostechvn.order_confirmation_full_looker_view
         WHERE IFNULL(total_invoiced_selling_quantity, 0) < selling_quantity;
     """
 
     backlog_by_kpi_center_query = """
-        SELECT *
+        SELECT kpi_type, backlog_by_kpi_center_usd
         FROM prostechvn.backlog_by_kpi_center_flat_looker_view
         WHERE IFNULL(total_invoiced_selling_quantity, 0) < selling_quantity;
     """
 
-    inv_df = pd.read_sql(text(inv_query), engine)
-    inv_by_kpi_center_df = pd.read_sql(text(inv_by_kpi_center_query), engine)
-    backlog_df = pd.read_sql(text(backlog_query), engine)
-    backlog_by_kpi_center_df = pd.read_sql(text(backlog_by_kpi_center_query), engine)
+    # The four queries are independent and I/O-bound, so run them concurrently;
+    # the engine's connection pool hands each worker its own connection.
+    queries = {
+        "inv": inv_query,
+        "inv_by_kpi_center": inv_by_kpi_center_query,
+        "backlog": backlog_query,
+        "backlog_by_kpi_center": backlog_by_kpi_center_query,
+    }
+    # Parse dates while fetching so downstream code never re-runs pd.to_datetime
+    read_kwargs = {"inv": {"parse_dates": ["inv_date"]}}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {
+            name: executor.submit(_read_view_cached, name, q, engine, **read_kwargs.get(name, {}))
+            for name, q in queries.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+
+    # Cast string group keys to category once here so every downstream groupby,
+    # isin and nunique runs on small integer codes instead of Python strings
+    for df in results.values():
+        for col in ("customer", "brand", "kpi_center", "kpi_type", "invoice_month"):
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+
+    inv_by_kpi_center_df = results["inv_by_kpi_center"]
+    backlog_by_kpi_center_df = results["backlog_by_kpi_center"]
+    internal_kpi_df = inv_by_kpi_center_df[inv_by_kpi_center_df["kpi_type"] == "INTERNAL"]
+    internal_backlog_kpi_df = backlog_by_kpi_center_df[backlog_by_kpi_center_df["kpi_type"] == "INTERNAL"]
+
+    return (
+        results["inv"],
+        inv_by_kpi_center_df,
+        internal_kpi_df,
+        results["backlog"],
+        backlog_by_kpi_center_df,
+        internal_backlog_kpi_df,
+    )
+
+
+@st.cache_data(ttl=1800)
+def load_customer_gp_data():
+    """
+    Load YTD gross profit aggregated per customer, already summed and sorted
+    by the database. Only ~1 row per customer crosses the wire instead of the
+    full invoice table.
+
+    Returns:
+        DataFrame with columns: customer, gp
+    """
+    engine = get_db_engine()
+
+    customer_gp_query = """
+        SELECT customer, SUM(invoiced_gross_profit_usd) AS gp
+        FROM prostechvn.sales_invoice_full_looker_view
+        WHERE DATE(inv_date) >= DATE_FORMAT(CURDATE(), '%Y-01-01')
+          AND inv_date < DATE_ADD(DATE_FORMAT(CURDATE(), '%Y-%m-%d'), INTERVAL 1 DAY)
+          AND customer IS NOT NULL
+        GROUP BY customer
+        ORDER BY gp DESC;
+    """
 
-    return inv_df, inv_by_kpi_center_df, backlog_df, backlog_by_kpi_center_df
+    return pd.read_sql(text(customer_gp_query), engine)
 
 
 @st.cache_data(ttl=1800)
@@ -56,24 +154,80 @@ def load_sales_performance_data():
     """
     Load data for sales performance page.
     """
+    # Column pushdown: only what the Sales Performance page actually reads
     sales_data_by_salesperson_query = """
-        SELECT * FROM prostechvn.sales_gp1_by_split_view
+        SELECT sales_name, employment_status, customer, inv_number, oc_number,
+               invoice_month, brand, sales_by_split_usd, gp1_by_split_usd
+        FROM prostechvn.sales_gp1_by_split_view
     """
     backlog_data_by_salesperson_query = """
-        SELECT * FROM prostechvn.backlog_by_salesperson_looker_view
+        SELECT sales_name, backlog_sales_by_split_usd, backlog_gp_by_split_usd
+        FROM prostechvn.backlog_by_salesperson_looker_view
     """
     kpi_by_salesperson_query = """
-        SELECT * FROM prostechvn.sales_employee_kpi_assignments_view
+        SELECT employee_name, kpi_name, annual_target_value
+        FROM prostechvn.sales_employee_kpi_assignments_view
     """
 
-    sales_report_by_salesperson_df = pd.read_sql(text(sales_data_by_salesperson_query), engine)
-    backlog_report_by_salesperson_df = pd.read_sql(text(backlog_data_by_salesperson_query), engine)
-    kpi_by_salesperson_df = pd.read_sql(text(kpi_by_salesperson_query), engine)
+    # Independent I/O-bound round-trips — overlap them, as load_data does
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        f_sales = executor.submit(pd.read_sql, text(sales_data_by_salesperson_query), engine)
+        f_backlog = executor.submit(pd.read_sql, text(backlog_data_by_salesperson_query), engine)
+        f_kpi = executor.submit(pd.read_sql, text(kpi_by_salesperson_query), engine)
+        sales_report_by_salesperson_df = f_sales.result()
+        backlog_report_by_salesperson_df = f_backlog.result()
+        kpi_by_salesperson_df = f_kpi.result()
 
+    # Parse the comma-formatted KPI targets into float64 once here, instead of
+    # per page interaction in calculate_salesperson_overview_metrics
+    kpi_by_salesperson_df["annual_target_value"] = (
+        kpi_by_salesperson_df["annual_target_value"]
+        .astype(str)
+        .str.replace(",", "", regex=False)
+        .astype("float64")
+    )
+
+    # Same category cast as load_data: integer codes for all group/filter keys
+    for df, cols in (
+        (sales_report_by_salesperson_df, ("sales_name", "employment_status", "customer", "brand", "invoice_month")),
+        (backlog_report_by_salesperson_df, ("sales_name",)),
+        (kpi_by_salesperson_df, ("employee_name", "kpi_name")),
+    ):
+        for col in cols:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+
+    # Index by salesperson so the page's per-selection slices are hash-based
+    # .loc lookups instead of full boolean scans. drop=False keeps the name
+    # column for the processing code that still reads it.
+    sales_report_by_salesperson_df = (
+        sales_report_by_salesperson_df.set_index("sales_name", drop=False).sort_index()
+    )
+    backlog_report_by_salesperson_df = (
+        backlog_report_by_salesperson_df.set_index("sales_name", drop=False).sort_index()
+    )
+    kpi_by_salesperson_df = (
+        kpi_by_salesperson_df.set_index("employee_name", drop=False).sort_index()
+    )
 
     return sales_report_by_salesperson_df, backlog_report_by_salesperson_df, kpi_by_salesperson_df
 
 
+@st.cache_data(ttl=1800)
+def load_active_sales_list():
+    """
+    Distinct, sorted list of ACTIVE salespeople for the filter selectbox.
+
+    Cached on its own so widget reruns reuse the list instead of
+    re-scanning the full split frame on every interaction.
+    """
+    sales_report_by_salesperson_df, _, _ = load_sales_performance_data()
+    active = sales_report_by_salesperson_df.loc[
+        sales_report_by_salesperson_df["employment_status"] == "ACTIVE", "sales_name"
+    ]
+    return sorted(active.dropna().unique().tolist())
+
+
 @st.cache_data(ttl=1800)
 def load_outbound_demand_data():
     engine = get_db_engine()
@@ -3,10 +3,64 @@ Module: data_processing
 Purpose: Handle all data calculations, aggregations, and preparation for visualizations.
 """
 
+import numpy as np
 import pandas as pd
+import streamlit as st
 from constants import MONTH_ORDER
 
+# Month-name lookup used instead of per-row strftime('%b'):
+# datetime64[M] % 12 indexes straight into this table.
+_MONTH_ABBR = list(MONTH_ORDER)
 
+
+def _fast_nunique(series: pd.Series) -> int:
+    """
+    Count distinct values via integer category codes when the loader has cast
+    the column to category; plain nunique (object hashing) otherwise.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        return int(np.unique(codes[codes >= 0]).size)  # drop the -1 NaN code
+    return int(series.nunique())
+
+
+def _cumulative_top_slice(gp_df: pd.DataFrame, top_percent: float) -> pd.DataFrame:
+    """
+    Fused sort + cumsum + threshold-cutoff kernel shared by all top-GP helpers.
+
+    Sorts by GrossProfit descending and keeps the rows covering top_percent of
+    the total, including the first row that crosses the threshold. One numpy
+    cumsum plus a binary search — no boolean masks or intermediate frames.
+    (A Numba kernel was considered but the result frames are tiny and numba is
+    not part of this deployment.)
+
+    The binary search assumes the cumsum rises through the threshold, which
+    only holds for a positive total; when total GP is zero or negative (a
+    net-loss book of business) every row is kept instead of truncating at an
+    arbitrary cutoff.
+    """
+    gp_df = gp_df.sort_values(by="GrossProfit", ascending=False)
+
+    gp = gp_df["GrossProfit"].to_numpy()
+    cumulative_gp = np.cumsum(gp)
+    total_gp = gp.sum()
+    if total_gp > 0:
+        cutoff = min(np.searchsorted(cumulative_gp, top_percent * total_gp, side="right") + 1, len(gp))
+    else:
+        cutoff = len(gp)
+
+    top_df = gp_df.iloc[:cutoff].copy()
+    top_df["cumulative_gp"] = cumulative_gp[:cutoff]
+    # a zero total yields inf/NaN percentages (as the old pandas division did);
+    # keep that path silent instead of warning on every rerun
+    with np.errstate(divide="ignore", invalid="ignore"):
+        top_df["cumulative_percent"] = cumulative_gp[:cutoff] / total_gp
+        top_df["GP_Percent"] = top_df["GrossProfit"] / total_gp * 100
+
+    return top_df
+
+
+@st.cache_data(show_spinner=False)
 def prepare_salesperson_top_brands_by_gp(sales_df: pd.DataFrame, top_percent=0.8) -> pd.DataFrame:
     """
     Prepare top brands contributing to the specified % of gross profit for a specific salesperson.
@@ -19,33 +73,15 @@ def prepare_salesperson_top_brands_by_gp(sales_df: pd.DataFrame, top_percent=0.8
     Returns:
         DataFrame: Top brands with gross profit, cumulative %, and GP %.
     """
-    # Group gross profit by brand
-    brand_gp = sales_df.groupby("brand")["gp1_by_split_usd"].sum().reset_index()
-    brand_gp = brand_gp.sort_values(by="gp1_by_split_usd", ascending=False)
-
-    # Compute cumulative GP and % of total
-    brand_gp["cumulative_gp"] = brand_gp["gp1_by_split_usd"].cumsum()
-    total_gp = brand_gp["gp1_by_split_usd"].sum()
-    brand_gp["cumulative_percent"] = brand_gp["cumulative_gp"] / total_gp
-
-    # Ensure inclusion of the brand that crosses the threshold
-    first_exceed_index = brand_gp[brand_gp["cumulative_percent"] > top_percent].first_valid_index()
-
-    if first_exceed_index is None:
-        top_brands = brand_gp.copy()
-    else:
-        top_brands = brand_gp.loc[:first_exceed_index].copy()
-
-    # Rename columns and compute % contribution
-    top_brands.rename(columns={
-        "brand": "Brand",
-        "gp1_by_split_usd": "GrossProfit"
-    }, inplace=True)
-    top_brands["GP_Percent"] = top_brands["GrossProfit"] / total_gp * 100
+    # Group gross profit by brand (named aggregation gives the output columns directly)
+    brand_gp = sales_df.groupby("brand", as_index=False, sort=False, observed=True).agg(
+        GrossProfit=("gp1_by_split_usd", "sum")
+    ).rename(columns={"brand": "Brand"})
 
-    return top_brands
+    return _cumulative_top_slice(brand_gp, top_percent)
 
 
+@st.cache_data(show_spinner=False)
 def prepare_salesperson_top_customers_by_gp(sales_df: pd.DataFrame, top_percent=0.8) -> pd.DataFrame:
     """
     Prepare top customers contributing to the specified % of total gross profit
@@ -59,43 +95,27 @@ def prepare_salesperson_top_customers_by_gp(sales_df: pd.DataFrame, top_percent=
     Returns:
         DataFrame: Top customers with gross profit, cumulative %, and GP %.
     """
-    df = sales_df.groupby("customer").agg({
-        "gp1_by_split_usd": "sum"
-    }).reset_index()
-
-    df = df.sort_values(by="gp1_by_split_usd", ascending=False)
-    df["cumulative_gp"] = df["gp1_by_split_usd"].cumsum()
-    total_gp = df["gp1_by_split_usd"].sum()
-    df["cumulative_percent"] = df["cumulative_gp"] / total_gp
-
-    # Tìm index đầu tiên mà cumulative_percent > top_percent
-    first_exceed_index = df[df["cumulative_percent"] > top_percent].first_valid_index()
-
-    if first_exceed_index is None:
-        top_df = df.copy()
-    else:
-        top_df = df.loc[:first_exceed_index].copy()
-
-    # Rename + Add GP %
-    top_df.rename(columns={
-        "customer": "Customer",
-        "gp1_by_split_usd": "GrossProfit"
-    }, inplace=True)
-    top_df["GP_Percent"] = top_df["GrossProfit"] / total_gp * 100
+    df = sales_df.groupby("customer", as_index=False, sort=False, observed=True).agg(
+        GrossProfit=("gp1_by_split_usd", "sum")
+    ).rename(columns={"customer": "Customer"})
 
-    return top_df
+    return _cumulative_top_slice(df, top_percent)
 
 
+@st.cache_data(show_spinner=False)
 def prepare_salesperson_cumulative_data(monthly_df: pd.DataFrame) -> pd.DataFrame:
     """
     Prepare cumulative revenue & gross profit data for a salesperson.
     """
-    df = monthly_df.copy()
-    df['Cumulative Revenue'] = df['sales_by_split_usd'].cumsum()
-    df['Cumulative Gross Profit'] = df['gp1_by_split_usd'].cumsum()
+    # Shallow copy only — the two cumsums are new columns, the existing ones
+    # are shared with the input frame instead of deep-copied
+    df = monthly_df.copy(deep=False)
+    df['Cumulative Revenue'] = np.cumsum(monthly_df['sales_by_split_usd'].to_numpy())
+    df['Cumulative Gross Profit'] = np.cumsum(monthly_df['gp1_by_split_usd'].to_numpy())
     return df
 
 
+@st.cache_data(show_spinner=False)
 def prepare_salesperson_monthly_summary_data(sales_df: pd.DataFrame):
     """
     Prepare monthly summary for a salesperson, including Revenue, GP, GP% and Customer Count.
@@ -106,21 +126,26 @@ def prepare_salesperson_monthly_summary_data(sales_df: pd.DataFrame):
     Returns:
         DataFrame with columns: invoice_month, sales_by_split_usd, gp1_by_split_usd, gp_percent, customer_count
     """
+    # Factorize customers to int codes so the nunique aggregation hashes
+    # integers instead of strings. factorize encodes nulls as -1; mask them
+    # back to NaN so nunique keeps excluding missing customers.
+    cust_codes, _ = pd.factorize(sales_df['customer'])
+    cust_codes = np.where(cust_codes >= 0, cust_codes, np.nan)
+
     # Group by invoice_month
-    monthly_summary = sales_df.groupby('invoice_month').agg({
+    monthly_summary = sales_df.assign(_cust_code=cust_codes).groupby('invoice_month', observed=True, sort=False).agg({
         'sales_by_split_usd': 'sum',
         'gp1_by_split_usd': 'sum',
-        'customer': pd.Series.nunique
+        '_cust_code': 'nunique'
     }).reset_index()
 
-    # Calculate GP %
-    monthly_summary['gp_percent'] = monthly_summary.apply(
-        lambda row: (row['gp1_by_split_usd'] / row['sales_by_split_usd'] * 100) if row['sales_by_split_usd'] else 0,
-        axis=1
-    )
+    # Calculate GP % (vectorized; guard against divide-by-zero months)
+    rev = monthly_summary['sales_by_split_usd'].to_numpy()
+    gp = monthly_summary['gp1_by_split_usd'].to_numpy()
+    monthly_summary['gp_percent'] = np.where(rev != 0, gp / np.where(rev == 0, 1, rev) * 100, 0.0)
 
     # Rename for clarity
-    monthly_summary.rename(columns={'customer': 'customer_count'}, inplace=True)
+    monthly_summary.rename(columns={'_cust_code': 'customer_count'}, inplace=True)
 
     # Ensure all months are present
     all_months = pd.DataFrame({'invoice_month': MONTH_ORDER})
@@ -129,6 +154,7 @@ def prepare_salesperson_monthly_summary_data(sales_df: pd.DataFrame):
     return monthly_summary
 
 
+@st.cache_data(show_spinner=False)
 def calculate_salesperson_overview_metrics(sales_df, backlog_df, kpi_df, selected_sales):
     """
     Calculate YTD KPIs and KPI performance for a single salesperson.
@@ -143,9 +169,9 @@ def calculate_salesperson_overview_metrics(sales_df, backlog_df, kpi_df, selecte
         dict: Metrics including total performance and % KPI achieved.
     """
     # === YTD Metrics ===
-    total_customers = sales_df['customer'].nunique()
-    total_invoices = sales_df['inv_number'].nunique()
-    total_sales_orders_invoiced = sales_df['oc_number'].nunique()
+    total_customers = _fast_nunique(sales_df['customer'])
+    total_invoices = _fast_nunique(sales_df['inv_number'])
+    total_sales_orders_invoiced = _fast_nunique(sales_df['oc_number'])
 
     total_revenue = sales_df['sales_by_split_usd'].sum()
     total_gp = sales_df['gp1_by_split_usd'].sum()
@@ -164,15 +190,15 @@ def calculate_salesperson_overview_metrics(sales_df, backlog_df, kpi_df, selecte
     sales_kpi_row = kpi_df[kpi_df['employee_name'] == selected_sales]
 
     if not sales_kpi_row.empty:
-        # KPI Revenue
+        # KPI Revenue (annual_target_value is parsed to float64 at load time)
         kpi_revenue_row = sales_kpi_row[sales_kpi_row['kpi_name'].str.lower() == 'revenue']
         if not kpi_revenue_row.empty:
-            kpi_revenue = float(kpi_revenue_row['annual_target_value'].str.replace(',', '').iloc[0])
+            kpi_revenue = float(kpi_revenue_row['annual_target_value'].iloc[0])
 
         # KPI GP
         kpi_gp_row = sales_kpi_row[sales_kpi_row['kpi_name'].str.lower() == 'gross_profit']
         if not kpi_gp_row.empty:
-            kpi_gp = float(kpi_gp_row['annual_target_value'].str.replace(',', '').iloc[0])
+            kpi_gp = float(kpi_gp_row['annual_target_value'].iloc[0])
 
     # === Calculate % KPI Achieved ===
     percent_revenue_kpi = (total_revenue / kpi_revenue * 100) if kpi_revenue else None
@@ -195,9 +221,13 @@ def calculate_salesperson_overview_metrics(sales_df, backlog_df, kpi_df, selecte
 
 ###############
 
-def calculate_overview_metrics(inv_df, inv_by_kpi_center_df, backlog_df, backlog_by_kpi_center_df, exclude_internal=True):
+def calculate_overview_metrics(inv_df, internal_kpi_df, backlog_df, internal_backlog_kpi_df, exclude_internal=True):
     """
     Calculate main KPIs for the Overview section.
+
+    The INTERNAL slices come pre-filtered from load_data, so no kpi_type
+    re-scan happens here.
+
     Returns:
         dict: Dictionary of calculated KPIs.
     """
@@ -212,10 +242,10 @@ def calculate_overview_metrics(inv_df, inv_by_kpi_center_df, backlog_df, backlog
     outstanding_gp = backlog_df['outstanding_gross_profit_usd'].sum()
 
     if exclude_internal:
-        internal_revenue = inv_by_kpi_center_df[inv_by_kpi_center_df["kpi_type"] == "INTERNAL"]["sales_by_kpi_center_usd"].sum()
+        internal_revenue = internal_kpi_df["sales_by_kpi_center_usd"].sum()
         display_revenue = max(total_revenue - internal_revenue, 0)
 
-        internal_outstanding = backlog_by_kpi_center_df[backlog_by_kpi_center_df["kpi_type"] == "INTERNAL"]["backlog_by_kpi_center_usd"].sum()
+        internal_outstanding = internal_backlog_kpi_df["backlog_by_kpi_center_usd"].sum()
         display_outstanding = max(outstanding_revenue - internal_outstanding, 0)
     else:
         display_revenue = total_revenue
@@ -239,51 +269,62 @@ def calculate_overview_metrics(inv_df, inv_by_kpi_center_df, backlog_df, backlog
     }
 
 
-def prepare_monthly_summary_data(inv_df, inv_by_kpi_center_df, exclude_internal=True):
+@st.cache_data(show_spinner=False)
+def prepare_monthly_summary_data(inv_df, internal_kpi_df, exclude_internal=True):
     """
     Prepare monthly summary for Revenue, Gross Profit, GP%, Customer Count, and cumulative metrics.
 
     Args:
         inv_df (DataFrame): Invoice-level data.
-        inv_by_kpi_center_df (DataFrame): KPI center-level summary.
+        internal_kpi_df (DataFrame): Pre-filtered INTERNAL slice of the KPI-center summary.
         exclude_internal (bool): Whether to exclude INTERNAL sales.
 
     Returns:
         DataFrame: Monthly summary with calculated fields.
     """
-    # Extract invoice month
-    inv_df["invoice_month"] = pd.to_datetime(inv_df["inv_date"]).dt.strftime("%b")
+    # Extract invoice month (kept local — never written back onto the caller's frame,
+    # so cached inputs stay untouched). inv_date arrives as datetime64 from the
+    # loader; a LUT on the month ordinal avoids per-row strftime.
+    month_codes = inv_df["inv_date"].to_numpy().astype("datetime64[M]").astype("int64") % 12
+    invoice_month = pd.Series(
+        pd.Categorical.from_codes(month_codes, categories=_MONTH_ABBR),
+        index=inv_df.index,
+        name="invoice_month",
+    )
+
+    # Factorize customers to int codes so the nunique aggregation hashes
+    # integers instead of strings. factorize encodes nulls as -1; mask them
+    # back to NaN so nunique keeps excluding missing customers.
+    cust_codes, _ = pd.factorize(inv_df["customer"])
+    cust_codes = np.where(cust_codes >= 0, cust_codes, np.nan)
 
     # Group by invoice month
-    monthly_summary = inv_df.groupby("invoice_month").agg({
+    monthly_summary = inv_df.assign(_cust_code=cust_codes).groupby(invoice_month, observed=True, sort=False).agg({
         "calculated_invoiced_amount_usd": "sum",
         "invoiced_gross_profit_usd": "sum",
-        "customer": pd.Series.nunique  # customer count
+        "_cust_code": "nunique"  # customer count
     }).reindex(MONTH_ORDER).fillna(0).reset_index()
 
     # Rename for clarity
-    monthly_summary.rename(columns={"customer": "customer_count"}, inplace=True)
+    monthly_summary.rename(columns={"_cust_code": "customer_count"}, inplace=True)
 
     # Handle exclude_internal logic
     if exclude_internal:
-        internal_monthly = inv_by_kpi_center_df[
-            inv_by_kpi_center_df["kpi_type"] == "INTERNAL"
-        ].groupby("invoice_month").agg({
+        internal_monthly = internal_kpi_df.groupby("invoice_month", observed=True, sort=False).agg({
             "sales_by_kpi_center_usd": "sum"
         }).reindex(MONTH_ORDER).fillna(0).reset_index()
 
-        monthly_summary["adjusted_revenue_usd"] = (
-            monthly_summary["calculated_invoiced_amount_usd"] - internal_monthly["sales_by_kpi_center_usd"]
-        ).apply(lambda x: max(x, 0))
+        monthly_summary["adjusted_revenue_usd"] = np.maximum(
+            (monthly_summary["calculated_invoiced_amount_usd"] - internal_monthly["sales_by_kpi_center_usd"]).to_numpy(),
+            0
+        )
     else:
         monthly_summary["adjusted_revenue_usd"] = monthly_summary["calculated_invoiced_amount_usd"]
 
-    # GP %
-    monthly_summary["gp_percent"] = monthly_summary.apply(
-        lambda row: (row["invoiced_gross_profit_usd"] / row["adjusted_revenue_usd"] * 100)
-        if row["adjusted_revenue_usd"] else 0,
-        axis=1
-    )
+    # GP % (vectorized; guard against divide-by-zero months)
+    rev = monthly_summary["adjusted_revenue_usd"].to_numpy()
+    gp = monthly_summary["invoiced_gross_profit_usd"].to_numpy()
+    monthly_summary["gp_percent"] = np.where(rev != 0, gp / np.where(rev == 0, 1, rev) * 100, 0.0)
 
     # Cumulative
     monthly_summary["cumulative_revenue"] = monthly_summary["adjusted_revenue_usd"].cumsum()
@@ -292,13 +333,15 @@ def prepare_monthly_summary_data(inv_df, inv_by_kpi_center_df, exclude_internal=
     return monthly_summary
 
 
-def prepare_dimension_summary_data(inv_df, inv_by_kpi_center_df, dimension_type, exclude_internal=True):
+@st.cache_data(show_spinner=False)
+def prepare_dimension_summary_data(inv_df, inv_by_kpi_center_df, internal_kpi_df, dimension_type, exclude_internal=True):
     """
     Prepare summary for any KPI dimension (TERRITORY, VERTICAL).
 
     Args:
         inv_df (DataFrame): Invoice-level data.
         inv_by_kpi_center_df (DataFrame): KPI center-level summary.
+        internal_kpi_df (DataFrame): Pre-filtered INTERNAL slice of the KPI-center summary.
         dimension_type (str): 'TERRITORY' or 'VERTICAL'.
         exclude_internal (bool): Whether to exclude INTERNAL revenue.
 
@@ -310,95 +353,81 @@ def prepare_dimension_summary_data(inv_df, inv_by_kpi_center_df, dimension_type,
     total_gp = inv_df["invoiced_gross_profit_usd"].sum()
 
     if exclude_internal:
-        internal_revenue = inv_by_kpi_center_df[
-            inv_by_kpi_center_df["kpi_type"] == "INTERNAL"
-        ]["sales_by_kpi_center_usd"].sum()
+        internal_revenue = internal_kpi_df["sales_by_kpi_center_usd"].sum()
         total_revenue = max(total_revenue - internal_revenue, 0)
 
-    # Filter dimension data (excluding INTERNAL rows if needed)
-    dimension_df = inv_by_kpi_center_df[
-        (inv_by_kpi_center_df["kpi_type"] == dimension_type)
-        & (~inv_by_kpi_center_df["kpi_center"].str.contains("INTERNAL") if exclude_internal else True)
-    ]
-
-    # Group by center
-    grouped = dimension_df.groupby("kpi_center").agg({
-        "sales_by_kpi_center_usd": "sum",
-        "gross_profit_by_kpi_center_usd": "sum"
-    }).reset_index()
+    # Filter dimension data (excluding INTERNAL rows if needed). The INTERNAL
+    # marker is looked for only in the distinct center names; the row filter is
+    # then a vectorized isin instead of a per-row str.contains scan.
+    dimension_mask = inv_by_kpi_center_df["kpi_type"] == dimension_type
+    if exclude_internal:
+        internal_centers = {
+            center for center in inv_by_kpi_center_df["kpi_center"].unique()
+            if "INTERNAL" in str(center)
+        }
+        if internal_centers:
+            dimension_mask &= ~inv_by_kpi_center_df["kpi_center"].isin(internal_centers)
+    dimension_df = inv_by_kpi_center_df[dimension_mask]
+
+    # Group by center (named aggregation emits the final column names in one pass)
+    grouped = dimension_df.groupby("kpi_center", as_index=False, sort=False, observed=True).agg(
+        Revenue=("sales_by_kpi_center_usd", "sum"),
+        GrossProfit=("gross_profit_by_kpi_center_usd", "sum")
+    ).rename(columns={"kpi_center": "Center"})
 
     # Calculate unmapped
-    dimension_revenue_sum = grouped["sales_by_kpi_center_usd"].sum()
-    dimension_gp_sum = grouped["gross_profit_by_kpi_center_usd"].sum()
+    dimension_revenue_sum = grouped["Revenue"].sum()
+    dimension_gp_sum = grouped["GrossProfit"].sum()
 
     unmapped_revenue = max(total_revenue - dimension_revenue_sum, 0)
     unmapped_gp = max(total_gp - dimension_gp_sum, 0)
 
-    # Append Unmapped row
-    combined = pd.concat([
-        grouped,
-        pd.DataFrame([{
-            "kpi_center": "Unmapped",
-            "sales_by_kpi_center_usd": unmapped_revenue,
-            "gross_profit_by_kpi_center_usd": unmapped_gp
-        }])
-    ], ignore_index=True)
-
-    # Rename and calculate percentages
-    combined.rename(columns={
-        "kpi_center": "Center",
-        "sales_by_kpi_center_usd": "Revenue",
-        "gross_profit_by_kpi_center_usd": "GrossProfit"
-    }, inplace=True)
-
-    combined["Percent_Revenue"] = (combined["Revenue"] / combined["Revenue"].sum()) * 100
-    combined["Percent_GP"] = (combined["GrossProfit"] / combined["GrossProfit"].sum()) * 100
-
-    combined["GP_Percent"] = combined.apply(
-        lambda row: (row["GrossProfit"] / row["Revenue"] * 100) if row["Revenue"] else 0,
-        axis=1
+    # Append Unmapped row in place — no concat, so the grouped frame is not
+    # copied just to add one row. Center goes through str so the append works
+    # when kpi_center arrives as a categorical.
+    combined = grouped
+    combined["Center"] = combined["Center"].astype(str)
+    combined.loc[len(combined)] = {
+        "Center": "Unmapped",
+        "Revenue": unmapped_revenue,
+        "GrossProfit": unmapped_gp
+    }
+
+    # One pass: pull both columns out once, reduce once, assign all three
+    # percentage columns together
+    rev = combined["Revenue"].to_numpy()
+    gp = combined["GrossProfit"].to_numpy()
+    rev_total = rev.sum()
+    gp_total = gp.sum()
+
+    combined = combined.assign(
+        Percent_Revenue=rev / rev_total * 100,
+        Percent_GP=gp / gp_total * 100,
+        GP_Percent=np.where(rev != 0, gp / np.where(rev == 0, 1, rev) * 100, 0.0),
     )
 
     return combined
 
-def prepare_top_customers_by_gp(inv_df, top_percent=0.8):
+@st.cache_data(show_spinner=False)
+def prepare_top_customers_by_gp(customer_gp_df, top_percent=0.8):
     """
     Prepare top customers contributing to the specified % of total gross profit.
     Ensures inclusion of the first customer that causes cumulative % to exceed the threshold.
 
     Args:
-        inv_df (DataFrame): Raw invoice data.
+        customer_gp_df (DataFrame): Per-customer GP already aggregated by the
+            database (columns: customer, gp) — see data_loader.load_customer_gp_data.
         top_percent (float): Cumulative cutoff (e.g., 0.8 for top 80%).
 
     Returns:
         DataFrame: Top customers with gross profit, cumulative %, and GP %.
     """
-    # Group GP by customer
-    customer_gp = inv_df.groupby("customer")["invoiced_gross_profit_usd"].sum().reset_index()
-    customer_gp = customer_gp.sort_values(by="invoiced_gross_profit_usd", ascending=False)
-
-    # Calculate cumulative %
-    customer_gp["cumulative_gp"] = customer_gp["invoiced_gross_profit_usd"].cumsum()
-    total_gp = customer_gp["invoiced_gross_profit_usd"].sum()
-    customer_gp["cumulative_percent"] = customer_gp["cumulative_gp"] / total_gp
-
-    # Tìm index đầu tiên mà cumulative_percent > top_percent
-    first_exceed_index = customer_gp[customer_gp["cumulative_percent"] > top_percent].first_valid_index()
-
-    if first_exceed_index is None:
-        top_customers = customer_gp.copy()  # Trường hợp không có khách nào vượt ngưỡng
-    else:
-        top_customers = customer_gp.loc[:first_exceed_index].copy()
+    # Aggregation already done in SQL; only the cumulative cutoff runs here
+    customer_gp = customer_gp_df.rename(columns={"customer": "Customer", "gp": "GrossProfit"})
 
-    # Đổi tên cột và tính thêm GP %
-    top_customers.rename(columns={
-        "customer": "Customer",
-        "invoiced_gross_profit_usd": "GrossProfit"
-    }, inplace=True)
-    top_customers["GP_Percent"] = top_customers["GrossProfit"] / total_gp * 100
-
-    return top_customers
+    return _cumulative_top_slice(customer_gp, top_percent)
 
+@st.cache_data(show_spinner=False)
 def prepare_top_brands_by_gp(inv_df: pd.DataFrame, top_percent=0.8) -> pd.DataFrame:
     """
     Prepare top brands contributing to the specified % of total gross profit.
@@ -411,28 +440,9 @@ def prepare_top_brands_by_gp(inv_df: pd.DataFrame, top_percent=0.8) -> pd.DataFr
     Returns:
         DataFrame: Top brands with gross profit, cumulative %, and GP %.
     """
-    # Group gross profit by brand
-    brand_gp = inv_df.groupby("brand")["invoiced_gross_profit_usd"].sum().reset_index()
-    brand_gp = brand_gp.sort_values(by="invoiced_gross_profit_usd", ascending=False)
-
-    # Cumulative gross profit and percent
-    brand_gp["cumulative_gp"] = brand_gp["invoiced_gross_profit_usd"].cumsum()
-    total_gp = brand_gp["invoiced_gross_profit_usd"].sum()
-    brand_gp["cumulative_percent"] = brand_gp["cumulative_gp"] / total_gp
-
-    # Find index of first brand that pushes cumulative > threshold
-    first_exceed_index = brand_gp[brand_gp["cumulative_percent"] > top_percent].first_valid_index()
-
-    if first_exceed_index is None:
-        top_brands = brand_gp.copy()
-    else:
-        top_brands = brand_gp.loc[:first_exceed_index].copy()
-
-    # Rename and calculate %
-    top_brands.rename(columns={
-        "brand": "Brand",
-        "invoiced_gross_profit_usd": "GrossProfit"
-    }, inplace=True)
-    top_brands["GP_Percent"] = top_brands["GrossProfit"] / total_gp * 100
+    # Group gross profit by brand (named aggregation gives the output columns directly)
+    brand_gp = inv_df.groupby("brand", as_index=False, sort=False, observed=True).agg(
+        GrossProfit=("invoiced_gross_profit_usd", "sum")
+    ).rename(columns={"brand": "Brand"})
 
-    return top_brands
+    return _cumulative_top_slice(brand_gp, top_percent)
@@ -1,5 +1,5 @@
 import streamlit as st
-from data_loader import load_data
+from data_loader import load_data, load_customer_gp_data
 from data_processing import (
     calculate_overview_metrics,
     prepare_monthly_summary_data,
@@ -24,7 +24,14 @@ st.sidebar.header("Display Options")
 exclude_internal = st.sidebar.checkbox("🚫 Exclude INTERNAL Revenue (keep GP)", value=True)
 
 # Load Data
-inv_df, inv_by_kpi_center_df, backlog_df, backlog_by_kpi_center_df = load_data()
+(
+    inv_df,
+    inv_by_kpi_center_df,
+    internal_kpi_df,
+    backlog_df,
+    backlog_by_kpi_center_df,
+    internal_backlog_kpi_df,
+) = load_data()
 
 # ==================== Overview Section ====================
 st.markdown("---")
@@ -32,9 +39,9 @@ st.markdown(f"### Overview of Year-to-Date Business Performance ({'Excl. Interna
 
 kpis = calculate_overview_metrics(
     inv_df,
-    inv_by_kpi_center_df,
+    internal_kpi_df,
     backlog_df,
-    backlog_by_kpi_center_df,
+    internal_backlog_kpi_df,
     exclude_internal
 )
 
@@ -58,7 +65,7 @@ row9.metric("⏳ Outstanding GP % (YTD)", f"{kpis['outstanding_gp_percent']}%")
 st.markdown("---")
 st.subheader("📊 Monthly Revenue, Gross Profit, and GP% Chart")
 
-monthly_summary = prepare_monthly_summary_data(inv_df, inv_by_kpi_center_df, exclude_internal)
+monthly_summary = prepare_monthly_summary_data(inv_df, internal_kpi_df, exclude_internal)
 monthly_chart = build_monthly_revenue_gp_chart(monthly_summary, exclude_internal)
 st.altair_chart(monthly_chart, use_container_width=True)
 
@@ -75,6 +82,7 @@ st.subheader("🌍 KPI by Territory: Revenue & Gross Profit")
 territory_summary = prepare_dimension_summary_data(
     inv_df,
     inv_by_kpi_center_df,
+    internal_kpi_df,
     dimension_type="TERRITORY",
     exclude_internal=exclude_internal
 )
@@ -92,6 +100,7 @@ st.subheader("🏭 KPI by Vertical: Revenue & Gross Profit")
 vertical_summary = prepare_dimension_summary_data(
     inv_df,
     inv_by_kpi_center_df,
+    internal_kpi_df,
     dimension_type="VERTICAL",
     exclude_internal=exclude_internal
 )
@@ -107,8 +116,9 @@ st.altair_chart(vertical_bar_chart, use_container_width=True)
 st.markdown("---")
 st.subheader("🏆 Top 80% Customers by Gross Profit")
 
-# Prepare data
-top_customers_df = prepare_top_customers_by_gp(inv_df, top_percent=0.8)
+# Prepare data (per-customer GP is aggregated by the database)
+customer_gp_df = load_customer_gp_data()
+top_customers_df = prepare_top_customers_by_gp(customer_gp_df, top_percent=0.8)
 
 # Build chart
 top_customers_chart = build_top_customers_gp_chart(top_customers_df, exclude_internal)
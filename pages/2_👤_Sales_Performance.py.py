@@ -1,5 +1,5 @@
 import streamlit as st
-from data_loader import load_sales_performance_data
+from data_loader import load_sales_performance_data, load_active_sales_list
 
 from data_processing import (
     calculate_salesperson_overview_metrics,
@@ -16,6 +16,29 @@ from chart_builder import (
     build_salesperson_top_brands_gp_chart
 )
 
+# Rebuilding the Altair specs costs tens of ms per chart on every rerun, so
+# cache them keyed by the prepared frame + salesperson. st.cache_resource
+# (not cache_data) because chart objects should be reused, not pickled.
+@st.cache_resource(show_spinner=False, ttl=1800)
+def _monthly_chart(monthly_df, name):
+    return build_salesperson_monthly_chart(monthly_df, name)
+
+
+@st.cache_resource(show_spinner=False, ttl=1800)
+def _cumulative_chart(cumulative_df, name):
+    return build_salesperson_cumulative_chart(cumulative_df, name)
+
+
+@st.cache_resource(show_spinner=False, ttl=1800)
+def _top_customers_chart(top_customers_df, name):
+    return build_salesperson_top_customers_gp_chart(top_customers_df, name)
+
+
+@st.cache_resource(show_spinner=False, ttl=1800)
+def _top_brands_chart(top_brands_df, name):
+    return build_salesperson_top_brands_gp_chart(top_brands_df, name)
+
+
 st.set_page_config(page_title="Performance by Salesperson", layout="wide")
 st.title("👔 YTD Sales Performance Summary")
 
@@ -25,17 +48,8 @@ sales_report_by_salesperson_df, backlog_report_by_salesperson_df, kpi_by_salespe
 # ========== Filter section (Main page) ==========
 st.subheader("🔎 Filter Options")
 
-# Get unique salesperson list
-# sales_list = sorted(sales_report_by_salesperson_df['sales_name'].unique().tolist())
-# Filter only ACTIVE sales employees, then get unique, sorted list of names
-sales_list = (
-    sales_report_by_salesperson_df[sales_report_by_salesperson_df["employment_status"] == "ACTIVE"]
-    ["sales_name"]
-    .dropna()
-    .unique()
-    .tolist()
-)
-sales_list = sorted(sales_list)
+# Get unique salesperson list (ACTIVE only) — cached so reruns skip the scan
+sales_list = load_active_sales_list()
 
 
 # Dropdown single-select (default to first person)
@@ -45,18 +59,21 @@ selected_sales = st.selectbox(
     index=0
 )
 
-# Filter DataFrames based on selection
-filtered_sales_report_df = sales_report_by_salesperson_df[
-    sales_report_by_salesperson_df['sales_name'] == selected_sales
-]
+# Filter DataFrames based on selection — the loader indexes these frames by
+# salesperson, so this is a hash lookup instead of a boolean scan per rerun
+filtered_sales_report_df = sales_report_by_salesperson_df.loc[[selected_sales]]
 
-filtered_backlog_df = backlog_report_by_salesperson_df[
-    backlog_report_by_salesperson_df['sales_name'] == selected_sales
-]
+filtered_backlog_df = (
+    backlog_report_by_salesperson_df.loc[[selected_sales]]
+    if selected_sales in backlog_report_by_salesperson_df.index
+    else backlog_report_by_salesperson_df.iloc[0:0]
+)
 
-filtered_kpi_df = kpi_by_salesperson_df[
-    kpi_by_salesperson_df['employee_name'] == selected_sales
-]
+filtered_kpi_df = (
+    kpi_by_salesperson_df.loc[[selected_sales]]
+    if selected_sales in kpi_by_salesperson_df.index
+    else kpi_by_salesperson_df.iloc[0:0]
+)
 
 # ==================== Salesperson YTD Overview ====================
 st.markdown("---")
@@ -112,7 +129,7 @@ st.subheader(f"📊 Monthly Revenue, Gross Profit, GP% & Customer Count Chart fo
 monthly_sales_summary = prepare_salesperson_monthly_summary_data(filtered_sales_report_df)
 
 # Build chart
-monthly_chart = build_salesperson_monthly_chart(monthly_sales_summary, selected_sales)
+monthly_chart = _monthly_chart(monthly_sales_summary, selected_sales)
 
 # Display
 st.altair_chart(monthly_chart, use_container_width=True)
@@ -124,7 +141,7 @@ st.markdown("---")
 salesperson_cumulative_df = prepare_salesperson_cumulative_data(monthly_sales_summary)
 
 # Build chart
-cumulative_chart = build_salesperson_cumulative_chart(salesperson_cumulative_df, selected_sales)
+cumulative_chart = _cumulative_chart(salesperson_cumulative_df, selected_sales)
 
 # Show chart
 st.altair_chart(cumulative_chart, use_container_width=True)
@@ -140,7 +157,7 @@ st.subheader(f"🏆 Top 80% Customers by Gross Profit for {selected_sales}")
 top_customers_df = prepare_salesperson_top_customers_by_gp(filtered_sales_report_df, top_percent=0.8)
 
 # Build chart
-top_customers_chart = build_salesperson_top_customers_gp_chart(top_customers_df, selected_sales)
+top_customers_chart = _top_customers_chart(top_customers_df, selected_sales)
 
 # Show chart
 st.altair_chart(top_customers_chart, use_container_width=True)
@@ -155,7 +172,7 @@ st.subheader(f"🏆 Top 80% Brands by Gross Profit for {selected_sales}")
 salesperson_top_brands_df = prepare_salesperson_top_brands_by_gp(filtered_sales_report_df, top_percent=0.8)
 
 # Vẽ biểu đồ
-chart = build_salesperson_top_brands_gp_chart(salesperson_top_brands_df, selected_sales)
+chart = _top_brands_chart(salesperson_top_brands_df, selected_sales)
 st.altair_chart(chart, use_container_width=True)
 
 